@@ -1,6 +1,11 @@
 from datetime import datetime
-from flask import Flask, render_template
-from models.db import db, init_db
+
+import click
+import orjson
+from flask import Flask, g, render_template
+from flask.cli import with_appcontext
+from flask.json.provider import DefaultJSONProvider
+from models.db import db, init_db, ProjectStatus
 from controllers.auth import auth_bp, init_oauth
 from controllers.notifications import notifications_bp
 from controllers.groups import groups_bp
@@ -9,72 +14,110 @@ from controllers.admin import admin_bp
 from controllers.dashboard import dashboard
 from controllers.htmx import htmx_bp
 from controllers.chapters import chapters_bp
+from controllers.similarity import backfill_embeddings
 
 from config import Config
 
-app = Flask(__name__)
-app.config.from_object(Config)
-
-app.register_blueprint(auth_bp)
-app.register_blueprint(dashboard)
-app.register_blueprint(projects_bp)
-app.register_blueprint(notifications_bp)
-app.register_blueprint(htmx_bp)
-app.register_blueprint(admin_bp)
-app.register_blueprint(groups_bp)
-app.register_blueprint(chapters_bp)
 
-init_oauth(app)
-init_db(app)
+_STATUS_COLORS = {
+    'approved': 'success',
+    'pending': 'warning',
+    'rejected': 'danger',
+    'duplicate': 'danger',
+    'under_review': 'info'
+}
+_STATUS_COLORS_BY_ENUM = {s: _STATUS_COLORS[s.value] for s in ProjectStatus}
 
 
-@app.template_filter('status_color')
 def status_color(status):
     """Get color class for status"""
-    colors = {
-        'approved': 'success',
-        'pending': 'warning',
-        'rejected': 'danger',
-        'duplicate': 'danger',
-        'under_review': 'info'
-    }
-    return colors.get(status.value if hasattr(status, 'value') else status, 'secondary')
+    return (_STATUS_COLORS_BY_ENUM.get(status)
+            or _STATUS_COLORS.get(getattr(status, 'value', status), 'secondary'))
+
+
+_TIMEAGO_UNITS = (
+    (365 * 86400, 'year'),
+    (30 * 86400,  'month'),
+    (86400,       'day'),
+    (3600,        'hour'),
+    (60,          'minute'),
+)
 
 
-@app.template_filter('timeago')
 def timeago(dt):
     """Convert datetime to relative time"""
     if not dt:
         return ''
-    
-    now = datetime.utcnow()
-    diff = now - dt
-    
-    if diff.days > 365:
-        return f"{diff.days // 365} year{'s' if diff.days // 365 > 1 else ''} ago"
-    elif diff.days > 30:
-        return f"{diff.days // 30} month{'s' if diff.days // 30 > 1 else ''} ago"
-    elif diff.days > 0:
-        return f"{diff.days} day{'s' if diff.days > 1 else ''} ago"
-    elif diff.seconds > 3600:
-        return f"{diff.seconds // 3600} hour{'s' if diff.seconds // 3600 > 1 else ''} ago"
-    elif diff.seconds > 60:
-        return f"{diff.seconds // 60} minute{'s' if diff.seconds // 60 > 1 else ''} ago"
-    else:
-        return "just now"
-
-
-
-@app.errorhandler(404)
+
+    # One clock read per request so every row on the page agrees
+    if 'now' not in g:
+        g.now = datetime.utcnow()
+    seconds = (g.now - dt).total_seconds()
+
+    for unit_seconds, unit in _TIMEAGO_UNITS:
+        if seconds >= unit_seconds:
+            n = int(seconds // unit_seconds)
+            return f"{n} {unit if n == 1 else unit + 's'} ago"
+    return "just now"
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify / tojson through orjson; types it can't encode natively
+    (Decimal, __html__ markup) fall back to Flask's default handler."""
+    _OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def not_found(error):
     return render_template('404.html'), 404
 
 
-@app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return render_template('500.html'), 500
 
 
+@click.command('backfill-embeddings')
+@with_appcontext
+def backfill_embeddings_command():
+    """Embed projects whose stored vectors are missing or stale."""
+    click.echo(f"Embedded {backfill_embeddings()} project(s).")
+
+
+def create_app(config_object=Config):
+    """Application factory — the single place blueprints and extensions are wired."""
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    app.json = OrjsonProvider(app)
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(dashboard)
+    app.register_blueprint(projects_bp)
+    app.register_blueprint(notifications_bp)
+    app.register_blueprint(htmx_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(groups_bp)
+    app.register_blueprint(chapters_bp)
+
+    app.add_template_filter(status_color, 'status_color')
+    app.add_template_filter(timeago, 'timeago')
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
+    app.cli.add_command(backfill_embeddings_command)
+
+    init_oauth(app)
+    init_db(app)
+
+    return app
+
+
+app = create_app()
+
+
 if __name__ == '__main__':
-    app.run()
\ No newline at end of file
+    app.run()
@@ -1,5 +1,5 @@
-from flask import Blueprint, flash, redirect, render_template, session, url_for
-from models.db import Project, Stream, Notification, UserRole, ProjectStatus, User
+from flask import Blueprint, flash, g, redirect, render_template, session, url_for
+from models.db import Project, Stream, Notification, UserRole, ProjectStatus, User, db
 from functools import wraps
 
 dashboard = Blueprint('dashboard', __name__)
@@ -15,10 +15,11 @@ def login_required(f):
     return decorated_function
 
 def get_current_user():
-    """Get the currently logged in user"""
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
+    """Get the currently logged in user (loaded once per request)"""
+    if '_current_user' not in g:
+        user_id = session.get('user_id')
+        g._current_user = User.query.get(user_id) if user_id else None
+    return g._current_user
 
 @dashboard.route('/dashboard')
 @login_required
@@ -26,11 +27,21 @@ def dash():
     """Dashboard page"""
     user = get_current_user()
     
-    # Get statistics
-    total_projects = Project.query.count()
-    approved_projects = Project.query.filter_by(status=ProjectStatus.APPROVED).count()
-    pending_projects = Project.query.filter_by(status=ProjectStatus.PENDING).count()
-    total_streams = Stream.query.count()
+    # Get statistics + unread notifications in a single round-trip
+    total_streams_q = db.select(db.func.count(Stream.id)).scalar_subquery()
+    unread_q = db.select(db.func.count(Notification.id)).where(
+        Notification.user_id == user.id,
+        Notification.is_read == False,
+    ).scalar_subquery()
+
+    (total_projects, approved_projects, pending_projects,
+     total_streams, unread_notifications) = db.session.query(
+        db.func.count(Project.id),
+        db.func.count(db.case((Project.status == ProjectStatus.APPROVED, 1))),
+        db.func.count(db.case((Project.status == ProjectStatus.PENDING, 1))),
+        total_streams_q,
+        unread_q,
+    ).select_from(Project).one()
     
     # Get user's projects
     user_projects = Project.query.filter_by(user_id=user.id)\
@@ -41,18 +52,13 @@ def dash():
     # Get recent projects for admin/reviewer
     if user.role in [UserRole.ADMIN, UserRole.REVIEWER]:
         recent_projects = Project.query\
+            .options(db.selectinload(Project.author))\
             .order_by(Project.submitted_at.desc())\
             .limit(10)\
             .all()
     else:
         recent_projects = []
     
-    # Get unread notifications
-    unread_notifications = Notification.query.filter_by(
-        user_id=user.id,
-        is_read=False
-    ).count()
-    
     return render_template('dashboard.html',
         user=user,
         total_projects=total_projects,
@@ -1,11 +1,42 @@
-from flask import Blueprint, render_template, request
+import time
+import threading
+from flask import Blueprint, render_template, request, session
 from controllers.dashboard import login_required
-from .similarity import find_similar_projects          # ← OpenAI-powered
-
-from models.db import Project, ProjectStatus, db
+from .similarity import find_similar_projects_cached   # ← OpenAI-powered
 
 htmx_bp = Blueprint('htmx_bp', __name__)
 
+# Per-user token bucket for the live duplicate check. The form already
+# debounces (keyup changed delay:1s); this caps clients that don't.
+# Buckets live in process memory, so the cap applies per worker process:
+# with N workers a user can get up to N x _CHECK_RATE checks per second.
+_CHECK_RATE  = 10.0    # tokens refilled per second
+_CHECK_BURST = 10      # bucket size
+_BUCKET_IDLE = _CHECK_BURST / _CHECK_RATE   # seconds until any bucket is full again
+
+_check_buckets = {}    # user_id -> (tokens, last_refill)
+_check_lock    = threading.Lock()
+_next_prune    = 0.0
+
+
+def _allow_duplicate_check(user_id):
+    """Take one token from the user's bucket; False if it is empty."""
+    global _next_prune
+    now = time.monotonic()
+    with _check_lock:
+        # A bucket idle for _BUCKET_IDLE is full, same as having no entry
+        if now >= _next_prune:
+            for uid in [uid for uid, (_, last) in _check_buckets.items()
+                        if now - last >= _BUCKET_IDLE]:
+                del _check_buckets[uid]
+            _next_prune = now + _BUCKET_IDLE
+
+        tokens, last = _check_buckets.get(user_id, (_CHECK_BURST, now))
+        tokens = min(_CHECK_BURST, tokens + (now - last) * _CHECK_RATE)
+        allowed = tokens >= 1
+        _check_buckets[user_id] = (tokens - 1 if allowed else tokens, now)
+    return allowed
+
 
 @htmx_bp.route('/htmx/check-duplicate', methods=['POST'])
 @login_required
@@ -18,7 +49,11 @@ def htmx_check_duplicate():
     if len(title) < 10 or len(description) < 50:
         return ''
 
-    similar_projects = find_similar_projects(title, description)
+    # HTMX leaves the previous result in place on a 4xx response
+    if not _allow_duplicate_check(session['user_id']):
+        return '', 429
+
+    similar_projects = find_similar_projects_cached(title, description)
 
     if similar_projects:
         return render_template('partials/duplicate_warning.html',
@@ -39,55 +74,17 @@ def htmx_check_duplicate():
 @htmx_bp.route('/htmx/projects')
 @login_required
 def htmx_projects():
-    """HTMX endpoint for paginated/filtered project list."""
-    program       = request.args.get('program', '').strip()
-    year_filter   = request.args.get('year', '').strip()
-    status_filter = request.args.get('status')
-    search        = request.args.get('search', '')
-    page          = request.args.get('page', 1, type=int)
-
-    query = Project.query
-
-    if program or year_filter:
-        from models.db import Stream
-        stream_query = Stream.query
-        if program:
-            stream_query = stream_query.filter(Stream.name.ilike(f'% {program}'))
-        if year_filter:
-            try:
-                stream_query = stream_query.filter_by(year=int(year_filter))
-            except ValueError:
-                pass
-        matching_ids = [s.id for s in stream_query.all()]
-        if matching_ids:
-            query = query.filter(Project.stream_id.in_(matching_ids))
-        else:
-            query = query.filter(db.false())
-
-    if status_filter:
-        try:
-            status_enum = ProjectStatus[status_filter.upper()]
-            query = query.filter_by(status=status_enum)
-        except KeyError:
-            pass
-
-    if search:
-        search_term = f'%{search}%'
-        query = query.filter(
-            db.or_(
-                Project.title.ilike(search_term),
-                Project.description.ilike(search_term)
-            )
-        )
-
-    query = query.order_by(Project.submitted_at.desc())
-    pagination = query.paginate(page=page, per_page=20, error_out=False)
+    """HTMX endpoint for the filtered project list (keyset-paginated)."""
+    from controllers.projects import PROGRAMS, build_project_query, keyset_page
+    projects, next_cursor = keyset_page(build_project_query(request.args),
+                                        request.args)
 
-    from controllers.projects import PROGRAMS
     return render_template('partials/project_list.html',
-        projects=pagination.items,
-        pagination=pagination,
+        projects=projects,
+        next_cursor=next_cursor,
         programs=PROGRAMS,
-        current_program=program,
-        current_year=year_filter,
-    )
\ No newline at end of file
+        current_program=request.args.get('program', '').strip(),
+        current_year=request.args.get('year', '').strip(),
+        current_status=request.args.get('status'),
+        search_query=request.args.get('search', ''),
+    )
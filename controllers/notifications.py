@@ -1,7 +1,7 @@
-from flask import Blueprint, jsonify, render_template
+from flask import Blueprint, abort, jsonify, render_template
 from controllers.dashboard import login_required, get_current_user
 
-from models.db import Notification
+from models.db import Notification, db
 
 notifications_bp = Blueprint('notifications_bp', __name__)
 
@@ -23,12 +23,30 @@ def notifications():
 @login_required
 def mark_notification_read(notification_id):
     """Mark notification as read"""
-    notification = Notification.query.get_or_404(notification_id)
     user = get_current_user()
-    
-    if notification.user_id != user.id:
+
+    # Common case is a single UPDATE; only a miss needs the row to explain why
+    if Notification.mark_read(notification_id, user.id):
+        db.session.commit()
+        return jsonify({'success': True})
+
+    owner_id = db.session.scalar(
+        db.select(Notification.user_id).where(Notification.id == notification_id)
+    )
+    if owner_id is None:
+        abort(404)
+    if owner_id != user.id:
         return jsonify({'error': 'Unauthorized'}), 403
-    
-    notification.mark_as_read()
-    
-    return jsonify({'success': True})
\ No newline at end of file
+
+    return jsonify({'success': True})   # already read
+
+
+@notifications_bp.route('/notifications/read-all', methods=['POST'])
+@login_required
+def mark_all_notifications_read():
+    """Mark all of the current user's notifications as read"""
+    user = get_current_user()
+    updated = Notification.mark_all_read(user.id)
+    db.session.commit()
+
+    return jsonify({'success': True, 'updated': updated})
\ No newline at end of file
@@ -1,12 +1,13 @@
-from flask import Blueprint, flash, jsonify, redirect, render_template, request, session, url_for
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, session, url_for
 from controllers.dashboard import login_required, get_current_user
 from datetime import datetime
-from dotenv import load_dotenv
-from .similarity import find_similar_projects          # ← OpenAI-powered
+from .similarity import (clear_similarity_cache, embed_project,   # ← OpenAI-powered
+                         find_similar_projects)
 
-load_dotenv()
-
-from models.db import Comment, Notification, Project, ProjectStatus, ProjectCategory, Stream, Group, db, UserRole, SimilarityRecord
+from models.db import Comment, Notification, Project, ProjectStatus, ProjectCategory, Stream, Group, db, UserRole, SimilarityRecord, SCORE_SCALE
 
 projects_bp = Blueprint('projects', __name__)
 
@@ -19,12 +20,25 @@ def _get_programs():
     return PROGRAMS
 
 
+# Streams are seeded at startup and not edited at runtime, so the lookup map
+# used by the new/edit forms is served from memory for a short while.
+_STREAM_MAP_TTL   = 60     # seconds
+_stream_map_cache = {}     # active_only -> (expires_at, {name: id})
+
+
 def _get_stream_map(active_only=False):
     """Return a dict of {'YEAR PROG': stream_id} for JS lookups."""
-    q = Stream.query
+    now   = time.monotonic()
+    entry = _stream_map_cache.get(active_only)
+    if entry and entry[0] > now:
+        return dict(entry[1])
+
+    q = Stream.query.with_entities(Stream.name, Stream.id)
     if active_only:
         q = q.filter_by(is_active=True)
-    return {s.name: s.id for s in q.all()}
+    stream_map = {name: sid for name, sid in q.all()}
+    _stream_map_cache[active_only] = (now + _STREAM_MAP_TTL, stream_map)
+    return dict(stream_map)
 
 
 def _get_user_groups(user):
@@ -34,8 +48,9 @@ def _get_user_groups(user):
     return []
 
 
-def create_notification(user_id, title, message, notification_type, related_project_id=None):
-    """Create a notification for a user."""
+def create_notification(user_id, title, message, notification_type,
+                        related_project_id=None, commit=False):
+    """Create a notification for a user. The caller commits unless commit=True."""
     notification = Notification(
         user_id=user_id,
         title=title,
@@ -44,20 +59,106 @@ def create_notification(user_id, title, message, notification_type, related_proj
         related_project_id=related_project_id
     )
     db.session.add(notification)
-    db.session.commit()
+    if commit:
+        db.session.commit()
 
 
-# ── ROUTES ────────────────────────────────────────────────────────────────────
+# ── Background duplicate scan ─────────────────────────────────────────────────
+# The check is advisory, so new_project returns as soon as the project is saved
+# and the author hears about any matches through the usual notification.
 
-@projects_bp.route('/projects')
-@login_required
-def projects():
-    """All projects page."""
-    program       = request.args.get('program', '').strip()
-    year_filter   = request.args.get('year', '').strip()
-    status_filter = request.args.get('status')
-    search        = request.args.get('search', '')
-    page          = request.args.get('page', 1, type=int)
+_scan_executor     = ThreadPoolExecutor(max_workers=2, thread_name_prefix='duplicate-scan')
+_scans_in_flight   = set()   # queued or running
+_scans_running     = set()   # already read the project row
+_rescans_requested = set()   # text changed under a running scan
+_scans_lock        = threading.Lock()
+
+_TOP_SIMILAR = 5   # SimilarityRecords kept per project and shown on its page
+
+
+def check_duplicates_task(app, project_id):
+    """
+    Embed a project, flag it against approved projects and notify the author.
+    Run after submission and after any edit that changes the title or description.
+    """
+    with _scans_lock:
+        _scans_running.add(project_id)
+
+    with app.app_context():
+        try:
+            project = db.session.get(Project, project_id)
+            if project is None:
+                return
+
+            embed_project(project)
+            similar_projects = find_similar_projects(
+                project.title, project.description, exclude_id=project.id
+            )
+
+            # A re-scan after an edit replaces the previous findings
+            SimilarityRecord.query.filter_by(project_id=project.id).delete()
+            project.is_flagged_duplicate = bool(similar_projects)
+
+            if similar_projects:
+                # Plain rows — nothing reads these back before the commit
+                db.session.bulk_insert_mappings(SimilarityRecord, [{
+                    'project_id':             project.id,
+                    'similar_project_id':     similar['project'].id,
+                    'title_score':            round(similar['title_similarity'] * SCORE_SCALE),
+                    'description_score':      round(similar['description_similarity'] * SCORE_SCALE),
+                    'overall_score':          round(similar['overall_similarity'] * SCORE_SCALE),
+                } for similar in similar_projects[:_TOP_SIMILAR]])
+
+                create_notification(
+                    user_id=project.user_id,
+                    title='Similar Projects Found',
+                    message=(
+                        f'We found {len(similar_projects)} project(s) similar to '
+                        f'"{project.title}". Please review them before proceeding.'
+                    ),
+                    notification_type='duplicate_warning',
+                    related_project_id=project.id,
+                )
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Duplicate scan failed for project %s', project_id)
+        finally:
+            with _scans_lock:
+                _scans_running.discard(project_id)
+                rescan = project_id in _rescans_requested
+                _rescans_requested.discard(project_id)
+                if not rescan:
+                    _scans_in_flight.discard(project_id)
+            # This run may have scored the old text; go again with the current row
+            if rescan:
+                _scan_executor.submit(check_duplicates_task, app, project_id)
+
+
+def enqueue_duplicate_scan(project_id):
+    """
+    Schedule check_duplicates_task for a project. A scan that is still queued
+    will read the latest text anyway, so a second one is not added; a scan that
+    is already running is asked to run once more when it finishes.
+    """
+    with _scans_lock:
+        if project_id in _scans_in_flight:
+            if project_id in _scans_running:
+                _rescans_requested.add(project_id)
+            return False
+        _scans_in_flight.add(project_id)
+    _scan_executor.submit(check_duplicates_task,
+                          current_app._get_current_object(), project_id)
+    return True
+
+
+def build_project_query(args):
+    """Project list query for the program/year/status/search filters in args."""
+    program       = args.get('program', '').strip()
+    year_filter   = args.get('year', '').strip()
+    status_filter = args.get('status')
+    search        = args.get('search', '')
 
     query = Project.query
 
@@ -93,19 +194,71 @@ def projects():
             )
         )
 
-    query = query.order_by(Project.submitted_at.desc())
-    pagination = query.paginate(page=page, per_page=20, error_out=False)
+    return query
+
+
+def project_list_options():
+    """
+    Loader options for project list pages: author and stream are fetched
+    up front, and in debug any other lazy load raises instead of quietly
+    issuing one SELECT per row.
+    """
+    options = [db.selectinload(Project.author), db.selectinload(Project.stream)]
+    if current_app.debug:
+        options.append(db.raiseload('*'))
+    return options
+
 
-    programs = _get_programs()
+def keyset_page(query, args):
+    """
+    One page of `query`, newest first, continuing after the
+    (after_ts, after_id) cursor in args if present.
+    Returns (projects, next_cursor) — next_cursor is None on the last page.
+    No OFFSET scan and no COUNT(*) over the filtered set.
+    """
+    per_page = current_app.config['PROJECTS_PER_PAGE']
+
+    after_id = args.get('after_id', type=int)
+    try:
+        after_ts = datetime.fromisoformat(args.get('after_ts', ''))
+    except ValueError:
+        after_ts = None
+    if after_ts and after_id:
+        query = query.filter(db.or_(
+            Project.submitted_at < after_ts,
+            db.and_(Project.submitted_at == after_ts, Project.id < after_id),
+        ))
+
+    rows = query.options(*project_list_options())\
+        .order_by(Project.submitted_at.desc(), Project.id.desc())\
+        .limit(per_page + 1)\
+        .all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = {'after_ts': rows[-1].submitted_at.isoformat(),
+                       'after_id': rows[-1].id}
+    return rows, next_cursor
+
+
+# ── ROUTES ────────────────────────────────────────────────────────────────────
+
+@projects_bp.route('/projects')
+@login_required
+def projects():
+    """All projects page."""
+    projects, next_cursor = keyset_page(build_project_query(request.args),
+                                        request.args)
 
     return render_template('projects.html',
-        projects=pagination.items,
-        pagination=pagination,
-        programs=programs,
-        current_program=program,
-        current_year=year_filter,
-        current_status=status_filter,
-        search_query=search
+        projects=projects,
+        next_cursor=next_cursor,
+        programs=_get_programs(),
+        current_program=request.args.get('program', '').strip(),
+        current_year=request.args.get('year', '').strip(),
+        current_status=request.args.get('status'),
+        search_query=request.args.get('search', '')
     )
 
 
@@ -208,44 +361,10 @@ def new_project():
         db.session.add(project)
         db.session.commit()
 
-        # ── OpenAI-powered duplicate check ────────────────────────────────
-        similar_projects = find_similar_projects(
-            title, description, exclude_id=project.id
-        )
-
-        if similar_projects:
-            project.is_flagged_duplicate = True
-
-            for similar in similar_projects[:5]:
-                record = SimilarityRecord(
-                    project_id=project.id,
-                    similar_project_id=similar['project'].id,
-                    title_similarity=similar['title_similarity'],
-                    description_similarity=similar['description_similarity'],
-                    overall_similarity=similar['overall_similarity'],
-                )
-                db.session.add(record)
-
-            create_notification(
-                user_id=user.id,
-                title='Similar Projects Found',
-                message=(
-                    f'We found {len(similar_projects)} project(s) similar to '
-                    f'"{project.title}". Please review them before proceeding.'
-                ),
-                notification_type='duplicate_warning',
-                related_project_id=project.id,
-            )
-
-            db.session.commit()
-            flash(
-                f'Project submitted! Warning: {len(similar_projects)} similar '
-                f'project(s) were found — please review them.',
-                'warning'
-            )
-        else:
-            db.session.commit()
-            flash('Project submitted successfully!', 'success')
+        # ── Gemini-powered duplicate check, off the request thread ────────
+        enqueue_duplicate_scan(project.id)
+        flash('Project submitted! We are scanning for similar projects and will '
+              'notify you if any are found.', 'success')
 
         return redirect(url_for('projects.project_detail', project_id=project.id))
 
@@ -272,7 +391,13 @@ def project_detail(project_id):
 
     similar_projects = []
     if project.is_flagged_duplicate:
-        for record in SimilarityRecord.query.filter_by(project_id=project_id).all():
+        records = SimilarityRecord.query.options(
+            db.joinedload(SimilarityRecord.similar_project).joinedload(Project.author),
+            db.joinedload(SimilarityRecord.similar_project).joinedload(Project.stream),
+        ).filter_by(project_id=project_id).order_by(
+            SimilarityRecord.overall_score.desc()
+        ).limit(_TOP_SIMILAR).all()
+        for record in records:
             similar_projects.append({
                 'project': record.similar_project,
                 'title_similarity':       round(record.title_similarity * 100, 1),
@@ -280,7 +405,7 @@ def project_detail(project_id):
                 'overall_similarity':     round(record.overall_similarity * 100, 1),
             })
 
-    comments = Comment.query.filter_by(
+    comments = Comment.query.options(db.joinedload(Comment.author)).filter_by(
         project_id=project_id,
         parent_id=None,
         is_deleted=False,
@@ -336,6 +461,7 @@ def edit_project(project_id):
         return redirect(url_for('projects.project_detail', project_id=project_id))
 
     if request.method == 'POST':
+        old_text = (project.title, project.description)
         project.title        = request.form.get('title', '').strip()
         project.description  = request.form.get('description', '').strip()
         project.technologies = request.form.get('technologies', '').strip() or None
@@ -345,7 +471,13 @@ def edit_project(project_id):
         new_stream_id = request.form.get('stream_id', type=int)
         if new_stream_id:
             project.stream_id = new_stream_id
+        text_changed = (project.title, project.description) != old_text
         db.session.commit()
+        clear_similarity_cache()
+
+        # Unchanged text keeps its embeddings and findings; changed text is re-scanned
+        if text_changed:
+            enqueue_duplicate_scan(project.id)
 
         flash('Project updated successfully!', 'success')
         return redirect(url_for('projects.project_detail', project_id=project.id))
@@ -398,7 +530,6 @@ def update_project_status(project_id):
         project.reviewed_by_id = user.id
         project.reviewed_at    = datetime.utcnow()
         project.review_notes   = review_notes
-        db.session.commit()
 
         # ── When approved: create chapters if they don't exist yet ────────
         if status_enum == ProjectStatus.APPROVED:
@@ -447,7 +578,9 @@ def update_project_status(project_id):
                 related_project_id=project.id,
             )
 
+        # Status, chapters and notifications land in one transaction
         db.session.commit()
+        clear_similarity_cache()
         flash('Project status updated successfully!', 'success')
 
     except KeyError:
@@ -475,7 +608,6 @@ def add_comment(project_id):
         content=content,
     )
     db.session.add(comment)
-    db.session.commit()
 
     if user.id != project.user_id:
         create_notification(
@@ -485,6 +617,7 @@ def add_comment(project_id):
             notification_type='new_comment',
             related_project_id=project.id,
         )
+    db.session.commit()
 
     flash('Comment added successfully!', 'success')
     return redirect(url_for('projects.project_detail', project_id=project_id))
\ No newline at end of file
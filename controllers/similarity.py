@@ -3,13 +3,26 @@ similarity.py — Gemini-powered semantic duplicate detection.
 """
 
 import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union
+
 import numpy as np
 from dotenv import load_dotenv
+from flask import current_app
 from google import genai
 from google.genai import types
 
 load_dotenv()
 
+# Scoring config — read once at import, defaults as documented in the README
+_SIM_THRESHOLD = float(os.environ.get('SIMILARITY_THRESHOLD', 0.82))
+_TITLE_WEIGHT  = float(os.environ.get('TITLE_SIMILARITY_WEIGHT', 0.4))
+_DESC_WEIGHT   = float(os.environ.get('DESCRIPTION_SIMILARITY_WEIGHT', 0.6))
+
 _client = None
 
 def _get_client():
@@ -18,22 +31,92 @@ def _get_client():
         api_key = os.environ.get('GEMINI_API_KEY')
         if not api_key:
             raise ValueError("GEMINI_API_KEY is not set in your .env file.")
-        _client = genai.Client(api_key=api_key)
+        # Back off and retry on rate limiting / transient unavailability
+        _client = genai.Client(api_key=api_key, http_options=types.HttpOptions(
+            retry_options=types.HttpRetryOptions(
+                attempts=5, initial_delay=1.0, max_delay=30.0, exp_base=2.0,
+                http_status_codes=[429, 503],
+            )
+        ))
     return _client
 
 
-def get_embedding(text: str) -> np.ndarray:
+_EMBED_MODEL      = 'gemini-embedding-001'
+_EMBED_DIMS       = int(os.environ.get('EMBEDDING_DIMENSIONS', 768))   # Matryoshka truncation
+_EMBED_TAG        = f'{_EMBED_MODEL}/{_EMBED_DIMS}'   # what cache and stored keys are bound to
+_EMBED_BATCH_SIZE = 100      # max texts per embed_content request
+_EMBED_WORKERS    = int(os.environ.get('EMBEDDING_WORKERS', 4))   # concurrent requests
+
+# Per-process LRU of text -> vector; an embedding is a pure function of (model, text)
+_EMB_CACHE_MAX = 10_000
+_emb_cache     = OrderedDict()   # sha256(model, text) -> float32 vector
+_emb_lock      = threading.Lock()
+
+
+def _emb_key(text: str) -> bytes:
+    return hashlib.sha256(f'{_EMBED_TAG}\0{text}'.encode()).digest()
+
+
+def get_embedding(text: Union[str, List[str]]) -> np.ndarray:
     """
-    Get a Gemini embedding vector for a piece of text.
-    Uses gemini-embedding-001 (768-dimensional, semantically rich).
+    Get Gemini embedding vector(s).
+    Uses gemini-embedding-001 truncated to EMBEDDING_DIMENSIONS (768 by
+    default); truncated vectors are not unit length, so scoring normalises.
+
+    A single string returns one vector. A list of strings is sent in as
+    few requests as possible and returns a (len(text), dim) matrix whose
+    rows are in the same order as the input. Texts embedded recently are
+    served from an in-process LRU without calling the API.
     """
-    text = text.strip().replace('\n', ' ')
-    result = _get_client().models.embed_content(
-        model='gemini-embedding-001',
-        contents=text,
-        config=types.EmbedContentConfig(task_type='SEMANTIC_SIMILARITY')
-    )
-    return np.array(result.embeddings[0].values)
+    single = isinstance(text, str)
+    texts  = [t.strip().replace('\n', ' ') for t in ([text] if single else text)]
+    keys   = [_emb_key(t) for t in texts]
+
+    vectors = [None] * len(texts)
+    with _emb_lock:
+        for i, key in enumerate(keys):
+            vec = _emb_cache.get(key)
+            if vec is not None:
+                _emb_cache.move_to_end(key)
+                vectors[i] = vec
+
+    # Each distinct uncached text is sent once, however often it repeats
+    first_seen = {}
+    for i, vec in enumerate(vectors):
+        if vec is None:
+            first_seen.setdefault(keys[i], i)
+    misses = list(first_seen.values())
+
+    # The lock is not held across the HTTP call so concurrent misses don't serialise
+    chunks = [misses[start:start + _EMBED_BATCH_SIZE]
+              for start in range(0, len(misses), _EMBED_BATCH_SIZE)]
+
+    def embed_chunk(chunk):
+        return _get_client().models.embed_content(
+            model=_EMBED_MODEL,
+            contents=[texts[i] for i in chunk],
+            config=types.EmbedContentConfig(task_type='SEMANTIC_SIMILARITY',
+                                            output_dimensionality=_EMBED_DIMS)
+        ).embeddings
+
+    # Requests are network-bound, so several chunks go out concurrently
+    if len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(_EMBED_WORKERS, len(chunks))) as pool:
+            results = list(pool.map(embed_chunk, chunks))
+    else:
+        results = [embed_chunk(chunk) for chunk in chunks]
+
+    fetched = {}
+    with _emb_lock:
+        for chunk, embeddings in zip(chunks, results):
+            for i, e in zip(chunk, embeddings):
+                fetched[keys[i]] = _emb_cache[keys[i]] = np.asarray(e.values, dtype=np.float32)
+        while len(_emb_cache) > _EMB_CACHE_MAX:
+            _emb_cache.popitem(last=False)
+    vectors = [fetched[key] if vec is None else vec for vec, key in zip(vectors, keys)]
+
+    matrix = np.vstack(vectors)
+    return matrix[0] if single else matrix
 
 
 def cosine_similarity(vec_a: np.ndarray, vec_b: np.ndarray) -> float:
@@ -45,6 +128,83 @@ def cosine_similarity(vec_a: np.ndarray, vec_b: np.ndarray) -> float:
     return float(np.dot(vec_a, vec_b) / (norm_a * norm_b))
 
 
+def _unit_rows(vecs: np.ndarray) -> np.ndarray:
+    """L2-normalise a vector or each row of a matrix (zero rows stay zero)."""
+    norms = np.linalg.norm(vecs, axis=-1, keepdims=True)
+    return np.divide(vecs, norms, out=np.zeros_like(vecs), where=norms != 0)
+
+
+# Stored as float16 — half the bytes, and well inside cosine-score precision
+def _to_blob(vec: np.ndarray) -> bytes:
+    return np.asarray(vec, dtype=np.float16).tobytes()
+
+
+def _from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+
+
+def _embedding_key(title: str, description: str) -> str:
+    """
+    Identifies the (model, text) a stored embedding was computed from.
+    A row whose key no longer matches is treated as unembedded.
+    """
+    return hashlib.sha256(f'{_EMBED_TAG}\0{title}\0{description}'.encode()).hexdigest()
+
+
+def _store_embeddings(project, title_vec: np.ndarray, desc_vec: np.ndarray) -> None:
+    project.title_embedding       = _to_blob(title_vec)
+    project.description_embedding = _to_blob(desc_vec)
+    project.embedding_key         = _embedding_key(project.title, project.description)
+
+
+def _is_embed_worthy(title: str, description: str) -> bool:
+    """False for input too short to say anything about duplication."""
+    return len(title.split()) >= 3 or len(description.split()) >= 10
+
+
+def embed_project(project) -> None:
+    """
+    Store title/description embeddings on a Project row (caller commits).
+    Vectors already current for the row's text are left alone. If Gemini
+    is unavailable the columns are cleared and the vectors are computed
+    on demand by find_similar_projects instead.
+    """
+    if project.embedding_key == _embedding_key(project.title, project.description):
+        return
+    if not _is_embed_worthy(project.title, project.description):
+        project.title_embedding = project.description_embedding = None
+        project.embedding_key = None
+        return
+    try:
+        _store_embeddings(project, *get_embedding([project.title, project.description]))
+    except Exception as e:
+        current_app.logger.warning('Could not embed project %s: %s', project.id, e)
+        project.title_embedding = project.description_embedding = None
+        project.embedding_key = None
+
+
+def backfill_embeddings(batch_size: int = _EMBED_BATCH_SIZE // 2) -> int:
+    """
+    Embed every project whose stored vectors are missing or stale, committing
+    after each batch. Projects too short to embed are skipped, as in
+    embed_project. Returns the number of projects updated.
+    """
+    from models.db import Project, db
+
+    stale = [p for p in Project.query.order_by(Project.id).all()
+             if p.embedding_key != _embedding_key(p.title, p.description)
+             and _is_embed_worthy(p.title, p.description)]
+
+    for start in range(0, len(stale), batch_size):
+        chunk = stale[start:start + batch_size]
+        vecs  = get_embedding([p.title for p in chunk] + [p.description for p in chunk])
+        for i, project in enumerate(chunk):
+            _store_embeddings(project, vecs[i], vecs[len(chunk) + i])
+        db.session.commit()
+
+    return len(stale)
+
+
 def calculate_similarity(text1: str, text2: str) -> float:
     """
     Semantic similarity between two texts using Gemini embeddings.
@@ -52,13 +212,132 @@ def calculate_similarity(text1: str, text2: str) -> float:
     """
     if not text1.strip() or not text2.strip():
         return 0.0
+    if text1.strip() == text2.strip():
+        return 1.0       # identical input — skip both API calls
     try:
-        return cosine_similarity(get_embedding(text1), get_embedding(text2))
+        return cosine_similarity(*get_embedding([text1, text2]))
     except Exception as e:
-        print(f"[similarity] Gemini error: {e}")
+        current_app.logger.warning('Gemini error: %s', e)
         return 0.0
 
 
+def _aggregate(title_sims: np.ndarray, desc_sims: np.ndarray,
+               title_weight: float, desc_weight: float,
+               threshold: float) -> tuple:
+    """
+    Weight, threshold and rank candidate scores without a Python loop.
+    Returns (hit indices ordered best-first, overall scores for all rows).
+    """
+    overall = title_weight * title_sims + desc_weight * desc_sims
+    hits = np.flatnonzero(overall >= threshold)
+    return hits[np.argsort(-overall[hits], kind='stable')], overall
+
+
+# ── Candidate index ──────────────────────────────────────────────────────────
+# Normalised title/description matrices for every approved project, kept in
+# process memory (an exact flat inner-product index) and rebuilt only when the
+# approved set changes. A cheap aggregate query detects changes made by other
+# workers; clear_similarity_cache() drops it eagerly for this one.
+
+_index = None    # (fingerprint, ids, unit title matrix, unit description matrix, complete)
+
+
+def _candidate_fingerprint() -> tuple:
+    from models.db import Project, ProjectStatus, db
+
+    return tuple(db.session.execute(
+        db.select(db.func.count(Project.id), db.func.sum(Project.id),
+                  db.func.max(Project.updated_at))
+        .where(Project.status == ProjectStatus.APPROVED)
+    ).one())
+
+
+def _build_index() -> tuple:
+    """
+    Load stored vectors for every approved project long enough to embed. Returns
+    (ids, unit title matrix, unit description matrix, complete) where
+    complete is False if some rows could not be embedded.
+    """
+    from models.db import Project, ProjectStatus, db
+
+    # Stream plain column tuples — no ORM hydration for the long tail
+    rows = db.session.execute(db.select(
+        Project.id, Project.title, Project.description,
+        Project.title_embedding, Project.description_embedding,
+        Project.embedding_key,
+    ).where(Project.status == ProjectStatus.APPROVED)).yield_per(1000)
+
+    ids, title_vecs, desc_vecs, missing = [], [], [], []
+    for pid, p_title, p_desc, title_blob, desc_blob, key in rows:
+        # Same rule as embed_project: too short to ever be stored or matched
+        if not _is_embed_worthy(p_title, p_desc):
+            continue
+        if title_blob and desc_blob and key == _embedding_key(p_title, p_desc):
+            ids.append(pid)
+            title_vecs.append(_from_blob(title_blob))
+            desc_vecs.append(_from_blob(desc_blob))
+        else:
+            missing.append((pid, p_title, p_desc))
+
+    # Rows without stored vectors are embedded together in one batch
+    complete = True
+    if missing:
+        try:
+            vecs = get_embedding([t for _, t, _ in missing] +
+                                 [d for _, _, d in missing])
+        except Exception as e:
+            current_app.logger.warning('Skipping %d unembedded project(s): %s', len(missing), e)
+            complete = False
+        else:
+            ids.extend(pid for pid, _, _ in missing)
+            title_vecs.extend(vecs[:len(missing)])
+            desc_vecs.extend(vecs[len(missing):])
+
+    if not ids:
+        return np.empty(0, dtype=np.int64), None, None, complete
+    return (np.asarray(ids, dtype=np.int64),
+            _unit_rows(np.vstack(title_vecs)),
+            _unit_rows(np.vstack(desc_vecs)),
+            complete)
+
+
+def _candidate_index() -> tuple:
+    global _index
+
+    fingerprint = _candidate_fingerprint()
+    index = _index
+    if index is not None and index[0] == fingerprint:
+        return index
+
+    # Concurrent rebuilds only duplicate work; the swap itself is atomic
+    ids, title_matrix, desc_matrix, complete = _build_index()
+    index = (fingerprint, ids, title_matrix, desc_matrix, complete)
+    if complete:
+        _index = index
+    return index
+
+
+def _prune_and_score(title_matrix: np.ndarray, desc_matrix: np.ndarray,
+                     title_vec: np.ndarray, desc_vec: np.ndarray,
+                     threshold: float) -> tuple:
+    """
+    Cosine scores for both fields over the rows that can still reach the
+    threshold. The heavier-weighted field is scored first; a row that falls
+    short even with a perfect score on the other field (weight * sim +
+    other_weight * 1.0 < threshold) never has its other field scored.
+    Returns (kept row indices, title sims, description sims) for kept rows.
+    """
+    # Rows are pre-normalised, so cosine similarity is a single GEMV per field
+    if _TITLE_WEIGHT >= _DESC_WEIGHT:
+        title_sims = title_matrix @ title_vec
+        rows = np.flatnonzero(_TITLE_WEIGHT * title_sims + _DESC_WEIGHT >= threshold)
+        return rows, title_sims[rows], desc_matrix[rows] @ desc_vec
+
+    desc_sims = desc_matrix @ desc_vec
+    rows = np.flatnonzero(_DESC_WEIGHT * desc_sims + _TITLE_WEIGHT >= threshold)
+    return rows, title_matrix[rows] @ title_vec, desc_sims[rows]
+
+
 def find_similar_projects(title: str, description: str,
                            threshold: float = None,
                            exclude_id: int = None) -> list:
@@ -74,49 +353,114 @@ def find_similar_projects(title: str, description: str,
             'overall_similarity': float
         }]
     """
-    from models.db import Project, ProjectStatus
+    return _find_similar(title, description, threshold, exclude_id)[0]
 
-    if threshold is None:
-        threshold = float(os.environ.get('SIMILARITY_THRESHOLD'))
 
-    title_weight = float(os.environ.get('TITLE_SIMILARITY_WEIGHT'))
-    desc_weight  = float(os.environ.get('DESCRIPTION_SIMILARITY_WEIGHT'))
+def _find_similar(title: str, description: str,
+                  threshold: float = None, exclude_id: int = None) -> tuple:
+    """
+    find_similar_projects() plus whether every comparison actually ran.
+    Returns (results, complete); complete is False when Gemini failed for
+    the incoming text or for some candidates, so the result must not be
+    cached as an answer.
+    """
+    from models.db import Project
+
+    if threshold is None:
+        threshold = _SIM_THRESHOLD
+    if not _is_embed_worthy(title, description):
+        return [], True
 
-    # Embed the incoming project ONCE (2 API calls total)
+    # Embed the incoming project ONCE (one batched API call)
     try:
-        incoming_title_vec = get_embedding(title)
-        incoming_desc_vec  = get_embedding(description)
+        incoming_title_vec, incoming_desc_vec = get_embedding([title, description])
     except Exception as e:
-        print(f"[similarity] Could not embed incoming project: {e}")
-        return []
+        current_app.logger.warning('Could not embed incoming project: %s', e)
+        return [], False
+
+    _, ids, title_matrix, desc_matrix, complete = _candidate_index()
+    if not len(ids):
+        return [], complete
 
-    query = Project.query.filter_by(status=ProjectStatus.APPROVED)
+    rows, title_sims, desc_sims = _prune_and_score(
+        title_matrix, desc_matrix,
+        _unit_rows(incoming_title_vec), _unit_rows(incoming_desc_vec), threshold,
+    )
+    ids = ids[rows]
     if exclude_id:
-        query = query.filter(Project.id != exclude_id)
-    all_projects = query.all()
+        keep = ids != exclude_id
+        ids, title_sims, desc_sims = ids[keep], title_sims[keep], desc_sims[keep]
 
-    results = []
-    for project in all_projects:
-        try:
-            title_sim = cosine_similarity(
-                incoming_title_vec, get_embedding(project.title)
-            )
-            desc_sim = cosine_similarity(
-                incoming_desc_vec, get_embedding(project.description)
-            )
-        except Exception as e:
-            print(f"[similarity] Skipping project {project.id}: {e}")
-            continue
+    hits, overall = _aggregate(title_sims, desc_sims,
+                               _TITLE_WEIGHT, _DESC_WEIGHT, threshold)
+
+    if not len(hits):
+        return [], complete
+
+    # Load full Project objects only for the handful of hits
+    hit_ids = [int(ids[i]) for i in hits]
+    by_id = {p.id: p for p in Project.query.filter(Project.id.in_(hit_ids)).all()}
+
+    return [{
+        'project':                by_id[int(ids[i])],
+        'title_similarity':       round(float(title_sims[i]), 4),
+        'description_similarity': round(float(desc_sims[i]), 4),
+        'overall_similarity':     round(float(overall[i]), 4),
+    } for i in hits if int(ids[i]) in by_id], complete
+
+
+# ── Result cache for the live duplicate check ────────────────────────────────
+# The HTMX check fires on every keystroke and mostly repeats the last input.
+# Only ids + scores are kept so no ORM object outlives its session.
+
+_RESULT_TTL       = 30     # seconds
+_RESULT_CACHE_MAX = 256
+
+_result_cache = {}         # sha256(title, description) -> (expires_at, [(id, t, d, o)])
+_result_lock  = threading.Lock()
+
+
+def clear_similarity_cache() -> None:
+    """Drop memoised results — call when the set of approved projects changes."""
+    global _index
+    _index = None
+    with _result_lock:
+        _result_cache.clear()
+
+
+def find_similar_projects_cached(title: str, description: str) -> list:
+    """find_similar_projects() memoised for _RESULT_TTL seconds per input."""
+    from models.db import Project
+
+    key = hashlib.sha256(f'{title}\0{description}'.encode()).digest()
+    now = time.monotonic()
 
-        overall_sim = title_weight * title_sim + desc_weight * desc_sim
+    with _result_lock:
+        entry = _result_cache.get(key)
+    if entry and entry[0] > now:
+        hits = entry[1]
+        by_id = {p.id: p for p in
+                 Project.query.filter(Project.id.in_([h[0] for h in hits])).all()}
+        return [{
+            'project':                by_id[pid],
+            'title_similarity':       t,
+            'description_similarity': d,
+            'overall_similarity':     o,
+        } for pid, t, d, o in hits if pid in by_id]
 
-        if overall_sim >= threshold:
-            results.append({
-                'project':                project,
-                'title_similarity':       round(title_sim, 4),
-                'description_similarity': round(desc_sim, 4),
-                'overall_similarity':     round(overall_sim, 4),
-            })
+    results, complete = _find_similar(title, description)
+    if not complete:
+        return results     # a Gemini failure is not an answer worth repeating
 
-    results.sort(key=lambda x: x['overall_similarity'], reverse=True)
-    return results
\ No newline at end of file
+    with _result_lock:
+        if len(_result_cache) >= _RESULT_CACHE_MAX:
+            for k in [k for k, (exp, _) in _result_cache.items() if exp <= now]:
+                del _result_cache[k]
+            while len(_result_cache) >= _RESULT_CACHE_MAX:
+                del _result_cache[next(iter(_result_cache))]
+        _result_cache[key] = (now + _RESULT_TTL, [
+            (r['project'].id, r['title_similarity'],
+             r['description_similarity'], r['overall_similarity'])
+            for r in results
+        ])
+    return results
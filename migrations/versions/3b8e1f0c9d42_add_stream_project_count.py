@@ -0,0 +1,40 @@
+"""add streams.project_count
+
+Revision ID: 3b8e1f0c9d42
+Revises:
+Create Date: 2026-10-15 21:40:00
+
+Databases created by db.create_all() from the current models already have
+the column, so the step is skipped there and only the revision is stamped.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e1f0c9d42'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if 'project_count' in _columns('streams'):
+        return
+
+    op.add_column('streams', sa.Column('project_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+    op.execute(
+        'UPDATE streams SET project_count = '
+        '(SELECT count(projects.id) FROM projects WHERE projects.stream_id = streams.id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('streams') as batch_op:
+        batch_op.drop_column('project_count')
@@ -0,0 +1,43 @@
+"""add stored project embeddings
+
+Revision ID: 7c2d4a9e5f13
+Revises: 3b8e1f0c9d42
+Create Date: 2026-10-15 21:50:00
+
+The columns start empty; run `flask backfill-embeddings` afterwards to fill
+them (find_similar_projects embeds any missing rows on demand until then).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d4a9e5f13'
+down_revision = '3b8e1f0c9d42'
+branch_labels = None
+depends_on = None
+
+
+_COLUMNS = (
+    ('title_embedding',       sa.LargeBinary()),
+    ('description_embedding', sa.LargeBinary()),
+    ('embedding_key',         sa.String(length=64)),
+)
+
+
+def _columns(table):
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    existing = _columns('projects')
+    for name, type_ in _COLUMNS:
+        if name not in existing:
+            op.add_column('projects', sa.Column(name, type_, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('projects') as batch_op:
+        for name, _ in reversed(_COLUMNS):
+            batch_op.drop_column(name)
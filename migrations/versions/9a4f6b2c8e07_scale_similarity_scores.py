@@ -0,0 +1,65 @@
+"""store similarity scores as scaled smallints
+
+Revision ID: 9a4f6b2c8e07
+Revises: 7c2d4a9e5f13
+Create Date: 2026-10-15 22:00:00
+
+Float *_similarity columns become SmallInteger *_score columns holding
+round(score * SCORE_SCALE); existing rows are converted in place.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4f6b2c8e07'
+down_revision = '7c2d4a9e5f13'
+branch_labels = None
+depends_on = None
+
+
+SCORE_SCALE = 10000   # models.db.SCORE_SCALE at the time of this revision
+
+_RENAMES = (
+    ('title_similarity',       'title_score'),
+    ('description_similarity', 'description_score'),
+    ('overall_similarity',     'overall_score'),
+)
+
+
+def _columns(table):
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if 'overall_score' in _columns('similarity_records'):
+        return
+
+    for _, new in _RENAMES:
+        op.add_column('similarity_records', sa.Column(new, sa.SmallInteger(), nullable=True))
+    op.execute('UPDATE similarity_records SET ' + ', '.join(
+        f'{new} = CAST(ROUND({old} * {SCORE_SCALE}) AS SMALLINT)' for old, new in _RENAMES
+    ))
+
+    op.drop_index('idx_similarity_score', table_name='similarity_records')
+    with op.batch_alter_table('similarity_records') as batch_op:
+        for old, new in _RENAMES:
+            batch_op.alter_column(new, existing_type=sa.SmallInteger(), nullable=False)
+            batch_op.drop_column(old)
+    op.create_index('idx_similarity_score', 'similarity_records', ['overall_score'])
+
+
+def downgrade():
+    for old, _ in _RENAMES:
+        op.add_column('similarity_records', sa.Column(old, sa.Float(), nullable=True))
+    op.execute('UPDATE similarity_records SET ' + ', '.join(
+        f'{old} = {new} * 1.0 / {SCORE_SCALE}' for old, new in _RENAMES
+    ))
+
+    op.drop_index('idx_similarity_score', table_name='similarity_records')
+    with op.batch_alter_table('similarity_records') as batch_op:
+        for old, new in _RENAMES:
+            batch_op.alter_column(old, existing_type=sa.Float(), nullable=False)
+            batch_op.drop_column(new)
+    op.create_index('idx_similarity_score', 'similarity_records', ['overall_similarity'])
@@ -0,0 +1,67 @@
+"""store project status and user role as varchar + check
+
+Revision ID: c51e7d3a0b68
+Revises: 9a4f6b2c8e07
+Create Date: 2026-10-15 22:10:00
+
+On PostgreSQL the columns were native ENUM types (projectstatus, userrole);
+they become VARCHAR(16) and the orphaned types are dropped. Stored values
+are the enum member names either way, so no data changes.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51e7d3a0b68'
+down_revision = '9a4f6b2c8e07'
+branch_labels = None
+depends_on = None
+
+
+# (table, column, check constraint, native enum type, allowed values)
+_ENUM_COLUMNS = (
+    ('projects', 'status', 'ck_project_status', 'projectstatus',
+     ('PENDING', 'APPROVED', 'REJECTED', 'DUPLICATE', 'UNDER_REVIEW')),
+    ('users', 'role', 'ck_user_role', 'userrole',
+     ('STUDENT', 'ADMIN', 'REVIEWER', 'SUPERVISOR')),
+)
+
+
+def _in_list(values):
+    return ', '.join(f"'{v}'" for v in values)
+
+
+def upgrade():
+    bind     = op.get_bind()
+    postgres = bind.dialect.name == 'postgresql'
+
+    for table, column, check, enum_type, values in _ENUM_COLUMNS:
+        inspector = sa.inspect(bind)
+        existing  = next(c for c in inspector.get_columns(table) if c['name'] == column)
+        native    = postgres and isinstance(existing['type'], sa.Enum)
+        checks    = {c['name'] for c in inspector.get_check_constraints(table)}
+
+        if native:
+            op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} '
+                       f'TYPE VARCHAR(16) USING {column}::text')
+        if check not in checks:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, type_=sa.String(length=16),
+                                      existing_nullable=False)
+                batch_op.create_check_constraint(check, f'{column} IN ({_in_list(values)})')
+        if native:
+            op.execute(f'DROP TYPE IF EXISTS {enum_type}')
+
+
+def downgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for table, column, check, enum_type, values in _ENUM_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(check, type_='check')
+        if postgres:
+            op.execute(f'CREATE TYPE {enum_type} AS ENUM ({_in_list(values)})')
+            op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} '
+                       f'TYPE {enum_type} USING {column}::{enum_type}')
@@ -5,11 +5,43 @@ Using Flask-SQLAlchemy ORM
 
 import os
 import enum
+import time
 from datetime import datetime
+from flask import g, has_app_context
+from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.hybrid import hybrid_property
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from werkzeug.security import check_password_hash
 
 db = SQLAlchemy()
+migrate = Migrate()
+
+_ISO = datetime.isoformat
+
+
+def _iso(dt):
+    """ISO-8601 string for to_dict(), or None for an unset timestamp."""
+    return _ISO(dt) if dt is not None else None
+
+# Argon2id, OWASP parameters; lower ARGON2_MEMORY_COST (KiB) on small hosts.
+# Built on first use so a value from .env (loaded after this module is
+# imported) is still picked up.
+_ph = None
+
+
+def _password_hasher():
+    global _ph
+    if _ph is None:
+        _ph = PasswordHasher(time_cost=3,
+                             memory_cost=int(os.environ.get('ARGON2_MEMORY_COST', 65536)),
+                             parallelism=2)
+    return _ph
 
 
 # ── ENUMS ─────────────────────────────────────────────────────────────────────
@@ -75,17 +107,34 @@ group_members = db.Table(
 )
 
 
+# ── MIXINS ────────────────────────────────────────────────────────────────────
+
+class PKMixin:
+    """Surrogate integer primary key shared by every model"""
+    # sort_order keeps id the first column in CREATE TABLE, as it was when
+    # each model declared it inline (mixin columns otherwise come last)
+    id = db.mapped_column(db.Integer, primary_key=True, sort_order=-1)
+
+
+class TimestampMixin:
+    """created_at / updated_at with a single, shared onupdate rule"""
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow, nullable=False)
+
+
 # ── MODELS ────────────────────────────────────────────────────────────────────
 
-class User(db.Model):
+class User(PKMixin, TimestampMixin, db.Model):
     """User model for authentication and profile management"""
     __tablename__ = 'users'
 
-    id            = db.Column(db.Integer, primary_key=True)
     email         = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=True)
     full_name     = db.Column(db.String(100), nullable=False)
-    role          = db.Column(db.Enum(UserRole), default=UserRole.STUDENT, nullable=False)
+    role          = db.Column(db.Enum(UserRole, native_enum=False, length=16,
+                                          create_constraint=True, name='ck_user_role'),
+                              default=UserRole.STUDENT, nullable=False)
 
     # OAuth
     github_id = db.Column(db.String(100), unique=True, nullable=True)
@@ -95,10 +144,7 @@ class User(db.Model):
     profile_picture = db.Column(db.String(255), nullable=True)
     bio             = db.Column(db.Text, nullable=True)
 
-    # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
-                           onupdate=datetime.utcnow, nullable=False)
+    # Timestamps (created_at / updated_at from TimestampMixin)
     last_login = db.Column(db.DateTime, nullable=True)
 
     # Status
@@ -111,23 +157,41 @@ class User(db.Model):
 
     # Relationships
     projects          = db.relationship('Project', foreign_keys='Project.user_id',
-                                        backref='author', lazy='dynamic',
+                                        back_populates='author',
                                         cascade='all, delete-orphan')
     reviewed_projects = db.relationship('Project', foreign_keys='Project.reviewed_by_id',
                                         backref='reviewer', lazy='dynamic')
-    comments          = db.relationship('Comment', backref='author', lazy='dynamic',
+    comments          = db.relationship('Comment', back_populates='author',
                                         cascade='all, delete-orphan')
-    notifications     = db.relationship('Notification', backref='user', lazy='dynamic',
+    notifications     = db.relationship('Notification', back_populates='user',
                                         cascade='all, delete-orphan')
     # HIT400 supervisor relationship defined below the class (self-referential)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = _password_hasher().hash(password)
 
     def check_password(self, password):
+        """
+        Verify a password. Legacy Werkzeug hashes and Argon2 hashes with
+        outdated parameters are upgraded in place on success (caller commits).
+        """
         if not self.password_hash:
             return False
-        return check_password_hash(self.password_hash, password)
+
+        if not self.password_hash.startswith('$argon2'):
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+
+        hasher = _password_hasher()
+        try:
+            hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+        if hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     def to_dict(self):
         return {
@@ -137,7 +201,7 @@ class User(db.Model):
             'role': self.role.value,
             'profile_picture': self.profile_picture,
             'bio': self.bio,
-            'created_at': self.created_at.isoformat(),
+            'created_at': _iso(self.created_at),
             'is_active': self.is_active,
             'is_verified': self.is_verified,
             'supervisor_id': self.supervisor_id,
@@ -158,11 +222,10 @@ User.supervisees = db.relationship(
 )
 
 
-class Stream(db.Model):
+class Stream(PKMixin, db.Model):
     """Academic stream/cohort model"""
     __tablename__ = 'streams'
 
-    id       = db.Column(db.Integer, primary_key=True)
     name     = db.Column(db.String(100), unique=True, nullable=False, index=True)
     year     = db.Column(db.Integer, nullable=False)
     semester = db.Column(db.String(20), nullable=True)
@@ -174,7 +237,10 @@ class Stream(db.Model):
     is_active  = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
-    projects = db.relationship('Project', backref='stream', lazy='dynamic')
+    # Denormalised; kept in step by the Project mapper events below
+    project_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
+    projects = db.relationship('Project', back_populates='stream')
 
     def to_dict(self):
         return {
@@ -184,18 +250,17 @@ class Stream(db.Model):
             'semester': self.semester,
             'description': self.description,
             'is_active': self.is_active,
-            'project_count': self.projects.count(),
+            'project_count': self.project_count,
         }
 
     def __repr__(self):
         return f'<Stream {self.name}>'
 
 
-class Group(db.Model):
+class Group(PKMixin, db.Model):
     """HIT200 project group — supervised team of up to 5 students."""
     __tablename__ = 'groups'
 
-    id            = db.Column(db.Integer, primary_key=True)
     name          = db.Column(db.String(100), nullable=False)
     supervisor_id = db.Column(db.Integer, db.ForeignKey('users.id'),
                               nullable=False, index=True)
@@ -215,12 +280,10 @@ class Group(db.Model):
         return f'<Group {self.name}>'
 
 
-class Project(db.Model):
+class Project(PKMixin, db.Model):
     """Project submission model — core entity"""
     __tablename__ = 'projects'
 
-    id = db.Column(db.Integer, primary_key=True)
-
     # Core details
     title       = db.Column(db.String(200), nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
@@ -231,12 +294,15 @@ class Project(db.Model):
     group_id = db.Column(db.Integer, db.ForeignKey('groups.id'), nullable=True, index=True)
 
     # Ownership and stream
-    user_id   = db.Column(db.Integer, db.ForeignKey('users.id'),   nullable=False, index=True)
-    stream_id = db.Column(db.Integer, db.ForeignKey('streams.id'), nullable=False, index=True)
+    user_id   = db.Column(db.Integer, db.ForeignKey('users.id'),   nullable=False)
+    stream_id = db.Column(db.Integer, db.ForeignKey('streams.id'), nullable=False)
 
     # Status
-    status = db.Column(db.Enum(ProjectStatus),
-                       default=ProjectStatus.PENDING, nullable=False, index=True)
+    # VARCHAR + CHECK rather than a native ENUM type, so adding a status
+    # is a constraint change instead of an ALTER TYPE
+    status = db.Column(db.Enum(ProjectStatus, native_enum=False, length=16,
+                               create_constraint=True, name='ck_project_status'),
+                       default=ProjectStatus.PENDING, nullable=False)
 
     # Extra info
     technologies      = db.Column(db.Text,        nullable=True)
@@ -249,29 +315,56 @@ class Project(db.Model):
     duplicate_of_id      = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=True)
     similarity_score     = db.Column(db.Float, nullable=True)
 
+    # Cached Gemini embeddings (raw float16 bytes) — see controllers/similarity.py
+    title_embedding       = db.Column(db.LargeBinary, nullable=True)
+    description_embedding = db.Column(db.LargeBinary, nullable=True)
+    embedding_key         = db.Column(db.String(64), nullable=True)  # sha256(model, title, description)
+
     # Review
     reviewed_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     reviewed_at    = db.Column(db.DateTime, nullable=True)
     review_notes   = db.Column(db.Text, nullable=True)
 
     # Timestamps
-    submitted_at = db.Column(db.DateTime, default=datetime.utcnow,
-                             nullable=False, index=True)
+    submitted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at   = db.Column(db.DateTime, default=datetime.utcnow,
                              onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    duplicate_of       = db.relationship('Project', remote_side=[id], backref='duplicates')
+    author             = db.relationship('User', foreign_keys=[user_id],
+                                         back_populates='projects')
+    stream             = db.relationship('Stream', back_populates='projects')
+    duplicate_of       = db.relationship('Project', remote_side='Project.id', backref='duplicates')
     similarity_records = db.relationship('SimilarityRecord',
                                          foreign_keys='SimilarityRecord.project_id',
-                                         backref='project', lazy='dynamic',
+                                         back_populates='project',
                                          cascade='all, delete-orphan')
-    comments           = db.relationship('Comment', backref='project', lazy='dynamic',
+    comments           = db.relationship('Comment', back_populates='project',
                                          cascade='all, delete-orphan')
-    attachments        = db.relationship('Attachment', backref='project', lazy='dynamic',
+    attachments        = db.relationship('Attachment', back_populates='project',
                                          cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # "my projects" (dashboard) and status-filtered lists, newest first
+        db.Index('ix_project_user_submitted',   'user_id', submitted_at.desc()),
+        db.Index('ix_project_status_submitted', 'status',  submitted_at.desc()),
+        # program/year filter (stream_id IN ...) combined with a status filter
+        db.Index('ix_project_stream_status', 'stream_id', 'status'),
+        # unfiltered list: keyset cursor on (submitted_at, id), newest first
+        # (id comes from PKMixin, so it is not in scope in the class body)
+        db.Index('ix_project_submitted_id', submitted_at.desc(),
+                 db.literal_column('id').desc()),
+        # duplicate-detection candidate scan only ever reads approved rows
+        db.Index('ix_project_approved', 'id',
+                 postgresql_where=(status == ProjectStatus.APPROVED),
+                 sqlite_where=(status == ProjectStatus.APPROVED)),
+    )
+
     def to_dict(self, include_author=True, include_stream=True):
+        """Serialise the project. Related rows are only included when the
+        query already loaded them (joinedload/selectinload), so to_dict never
+        issues a lazy load of its own."""
+        unloaded = db.inspect(self).unloaded
         data = {
             'id': self.id,
             'title': self.title,
@@ -283,56 +376,125 @@ class Project(db.Model):
             'documentation_url': self.documentation_url,
             'is_flagged_duplicate': self.is_flagged_duplicate,
             'similarity_score': self.similarity_score,
-            'submitted_at': self.submitted_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
+            'submitted_at': _iso(self.submitted_at),
+            'updated_at': _iso(self.updated_at),
         }
-        if include_author and self.author:
+        if include_author and 'author' not in unloaded and self.author:
             data['author'] = {
                 'id': self.author.id,
                 'name': self.author.full_name,
                 'email': self.author.email,
             }
-        if include_stream and self.stream:
+        if include_stream and 'stream' not in unloaded and self.stream:
             data['stream'] = {
                 'id': self.stream.id,
                 'name': self.stream.name,
             }
-        if self.reviewer:
+        if 'reviewer' not in unloaded and self.reviewer:
             data['reviewer'] = {
                 'id': self.reviewer.id,
                 'name': self.reviewer.full_name,
             }
-            data['reviewed_at'] = self.reviewed_at.isoformat() if self.reviewed_at else None
+            data['reviewed_at'] = _iso(self.reviewed_at)
         return data
 
     def __repr__(self):
         return f'<Project {self.title}>'
 
 
-class SimilarityRecord(db.Model):
+# ── Stream.project_count maintenance ─────────────────────────────────────────
+
+def _bump_project_count(connection, stream_id, delta):
+    if stream_id is not None:
+        connection.execute(
+            db.update(Stream)
+            .where(Stream.id == stream_id)
+            .values(project_count=Stream.project_count + delta)
+        )
+
+
+@event.listens_for(Project, 'after_insert')
+def _project_inserted(mapper, connection, target):
+    _bump_project_count(connection, target.stream_id, 1)
+
+
+@event.listens_for(Project, 'after_delete')
+def _project_deleted(mapper, connection, target):
+    _bump_project_count(connection, target.stream_id, -1)
+
+
+@event.listens_for(Project, 'after_update')
+def _project_updated(mapper, connection, target):
+    history = db.inspect(target).attrs.stream_id.history
+    if history.has_changes():
+        for old_id in history.deleted:
+            _bump_project_count(connection, old_id, -1)
+        _bump_project_count(connection, target.stream_id, 1)
+
+
+# Project search is a substring ILIKE on title/description. On PostgreSQL,
+# trigram GIN indexes let that use an index instead of a sequential scan;
+# other backends keep the plain scan. Applied by init_db on every start, so
+# databases created before these existed pick them up too.
+_POSTGRES_SEARCH_DDL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ix_project_title_trgm '
+    'ON projects USING gin (title gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_project_description_trgm '
+    'ON projects USING gin (description gin_trgm_ops)',
+)
+
+
+SCORE_SCALE = 10000   # similarity scores are stored as round(score * SCORE_SCALE)
+
+
+def _score_property(attr):
+    """Float (0.0–1.0) view of a scaled SmallInteger score column, usable in queries."""
+    def fget(self):
+        value = getattr(self, attr)
+        return None if value is None else value / SCORE_SCALE
+
+    def fset(self, value):
+        setattr(self, attr, round(value * SCORE_SCALE))
+
+    def expr(cls):
+        return getattr(cls, attr) * (1.0 / SCORE_SCALE)
+
+    return hybrid_property(fget, fset, expr=expr)
+
+
+class SimilarityRecord(PKMixin, db.Model):
     """Track similarity between projects for duplicate detection"""
     __tablename__ = 'similarity_records'
 
-    id                 = db.Column(db.Integer, primary_key=True)
     project_id         = db.Column(db.Integer, db.ForeignKey('projects.id'),
-                                   nullable=False, index=True)
+                                   nullable=False)
     similar_project_id = db.Column(db.Integer, db.ForeignKey('projects.id'),
                                    nullable=False, index=True)
 
-    title_similarity       = db.Column(db.Float, nullable=False)
-    description_similarity = db.Column(db.Float, nullable=False)
-    overall_similarity     = db.Column(db.Float, nullable=False)
+    # Two bytes per score instead of an eight-byte float
+    title_score       = db.Column(db.SmallInteger, nullable=False)
+    description_score = db.Column(db.SmallInteger, nullable=False)
+    overall_score     = db.Column(db.SmallInteger, nullable=False)
+
+    title_similarity       = _score_property('title_score')
+    description_similarity = _score_property('description_score')
+    overall_similarity     = _score_property('overall_score')
 
     algorithm     = db.Column(db.String(50), default='sequence_matcher', nullable=False)
     calculated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    project         = db.relationship('Project', foreign_keys=[project_id],
+                                      back_populates='similarity_records')
     similar_project = db.relationship('Project', foreign_keys=[similar_project_id],
                                       backref='similarity_checks')
 
     __table_args__ = (
         db.UniqueConstraint('project_id', 'similar_project_id',
                             name='unique_similarity_pair'),
-        db.Index('idx_similarity_score', 'overall_similarity'),
+        db.Index('idx_similarity_score', 'overall_score'),
+        # "top matches for project X": index-ordered, reads only LIMIT rows
+        db.Index('ix_similarity_project_score', 'project_id', overall_score.desc()),
     )
 
     def to_dict(self):
@@ -340,22 +502,21 @@ class SimilarityRecord(db.Model):
             'id': self.id,
             'project_id': self.project_id,
             'similar_project_id': self.similar_project_id,
-            'title_similarity': round(self.title_similarity * 100, 2),
-            'description_similarity': round(self.description_similarity * 100, 2),
-            'overall_similarity': round(self.overall_similarity * 100, 2),
+            'title_similarity': round(self.title_score / 100, 2),
+            'description_similarity': round(self.description_score / 100, 2),
+            'overall_similarity': round(self.overall_score / 100, 2),
             'algorithm': self.algorithm,
-            'calculated_at': self.calculated_at.isoformat(),
+            'calculated_at': _iso(self.calculated_at),
         }
 
     def __repr__(self):
         return f'<SimilarityRecord P{self.project_id} <-> P{self.similar_project_id}>'
 
 
-class Comment(db.Model):
+class Comment(PKMixin, TimestampMixin, db.Model):
     """Comments on projects for feedback and discussion"""
     __tablename__ = 'comments'
 
-    id         = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'),
                            nullable=False, index=True)
     user_id    = db.Column(db.Integer, db.ForeignKey('users.id'),
@@ -366,13 +527,16 @@ class Comment(db.Model):
     is_edited  = db.Column(db.Boolean, default=False, nullable=False)
     is_deleted = db.Column(db.Boolean, default=False, nullable=False)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
-                           onupdate=datetime.utcnow, nullable=False)
+    project = db.relationship('Project', back_populates='comments')
+    author  = db.relationship('User', back_populates='comments')
+    parent  = db.relationship('Comment', remote_side='Comment.id', back_populates='replies')
+    replies = db.relationship('Comment', back_populates='parent',
+                              order_by='Comment.created_at')
 
-    replies = db.relationship('Comment',
-                              backref=db.backref('parent', remote_side=[id]),
-                              lazy='dynamic')
+    __table_args__ = (
+        # top-level, non-deleted comments for a project page
+        db.Index('ix_comment_project_thread', 'project_id', 'parent_id', 'is_deleted'),
+    )
 
     def to_dict(self, include_replies=False):
         data = {
@@ -386,12 +550,12 @@ class Comment(db.Model):
             },
             'is_edited': self.is_edited,
             'is_deleted': self.is_deleted,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
+            'created_at': _iso(self.created_at),
+            'updated_at': _iso(self.updated_at),
         }
         if include_replies:
             data['replies'] = [
-                r.to_dict() for r in self.replies.filter_by(is_deleted=False).all()
+                r.to_dict() for r in self.replies if not r.is_deleted
             ]
         return data
 
@@ -399,11 +563,10 @@ class Comment(db.Model):
         return f'<Comment {self.id} on Project {self.project_id}>'
 
 
-class Attachment(db.Model):
+class Attachment(PKMixin, db.Model):
     """File attachments for projects"""
     __tablename__ = 'attachments'
 
-    id         = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'),
                            nullable=False, index=True)
 
@@ -417,6 +580,7 @@ class Attachment(db.Model):
     uploaded_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     uploaded_at    = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    project  = db.relationship('Project', back_populates='attachments')
     uploader = db.relationship('User', backref='uploads')
 
     def to_dict(self):
@@ -427,7 +591,7 @@ class Attachment(db.Model):
             'file_size': self.file_size,
             'mime_type': self.mime_type,
             'file_type': self.file_type,
-            'uploaded_at': self.uploaded_at.isoformat(),
+            'uploaded_at': _iso(self.uploaded_at),
             'uploader': {
                 'id': self.uploader.id,
                 'name': self.uploader.full_name,
@@ -438,13 +602,11 @@ class Attachment(db.Model):
         return f'<Attachment {self.original_filename}>'
 
 
-class Notification(db.Model):
+class Notification(PKMixin, db.Model):
     """User notifications for system events"""
     __tablename__ = 'notifications'
 
-    id      = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'),
-                        nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
 
     title             = db.Column(db.String(200), nullable=False)
     message           = db.Column(db.Text, nullable=False)
@@ -452,16 +614,49 @@ class Notification(db.Model):
 
     related_project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=True)
 
-    is_read    = db.Column(db.Boolean, default=False, nullable=False, index=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    is_read    = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     read_at    = db.Column(db.DateTime, nullable=True)
 
+    __table_args__ = (
+        # a user's notification list, newest first
+        db.Index('ix_notification_user_created', 'user_id', created_at.desc()),
+        # unread badge counts — partial, so it holds only the small unread subset
+        db.Index('ix_notifications_unread', 'user_id', 'created_at',
+                 postgresql_where=(is_read == False),
+                 sqlite_where=(is_read == False)),
+    )
+
+    user            = db.relationship('User', back_populates='notifications')
     related_project = db.relationship('Project', backref='notifications')
 
     def mark_as_read(self):
+        """Mark this loaded notification read (caller commits)."""
         self.is_read = True
         self.read_at = datetime.utcnow()
-        db.session.commit()
+
+    @classmethod
+    def mark_read(cls, notification_id, user_id):
+        """
+        Mark one of user_id's notifications read with a single UPDATE,
+        without loading the row (caller commits). Returns the number of
+        rows changed — 0 if it is missing, someone else's, or already read.
+        """
+        return db.session.execute(
+            db.update(cls)
+            .where(cls.id == notification_id, cls.user_id == user_id,
+                   cls.is_read == False)
+            .values(is_read=True, read_at=datetime.utcnow())
+        ).rowcount
+
+    @classmethod
+    def mark_all_read(cls, user_id):
+        """Mark every unread notification for user_id read in one UPDATE (caller commits)."""
+        return db.session.execute(
+            db.update(cls)
+            .where(cls.user_id == user_id, cls.is_read == False)
+            .values(is_read=True, read_at=datetime.utcnow())
+        ).rowcount
 
     def to_dict(self):
         return {
@@ -470,8 +665,8 @@ class Notification(db.Model):
             'message': self.message,
             'notification_type': self.notification_type,
             'is_read': self.is_read,
-            'created_at': self.created_at.isoformat(),
-            'read_at': self.read_at.isoformat() if self.read_at else None,
+            'created_at': _iso(self.created_at),
+            'read_at': _iso(self.read_at),
             'related_project_id': self.related_project_id,
         }
 
@@ -479,11 +674,10 @@ class Notification(db.Model):
         return f'<Notification {self.id} for User {self.user_id}>'
 
 
-class AuditLog(db.Model):
+class AuditLog(PKMixin, db.Model):
     """Audit trail for important system actions"""
     __tablename__ = 'audit_logs'
 
-    id      = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
 
     action      = db.Column(db.String(100), nullable=False, index=True)
@@ -507,7 +701,7 @@ class AuditLog(db.Model):
             'entity_id': self.entity_id,
             'old_value': self.old_value,
             'new_value': self.new_value,
-            'created_at': self.created_at.isoformat(),
+            'created_at': _iso(self.created_at),
             'user': {'id': self.user.id, 'name': self.user.full_name} if self.user else None,
         }
 
@@ -515,7 +709,7 @@ class AuditLog(db.Model):
         return f'<AuditLog {self.action} on {self.entity_type}#{self.entity_id}>'
 
 
-class Chapter(db.Model):
+class Chapter(PKMixin, db.Model):
     """
     One chapter slot per project.
     Chapter 1 starts UNLOCKED; chapters 2-6 start LOCKED.
@@ -523,7 +717,6 @@ class Chapter(db.Model):
     """
     __tablename__ = 'chapters'
 
-    id         = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'),
                            nullable=False, index=True)
 
@@ -568,11 +761,10 @@ class Chapter(db.Model):
         return f'<Chapter {self.order} [{self.status.value}] for Project {self.project_id}>'
 
 
-class ChapterReview(db.Model):
+class ChapterReview(PKMixin, db.Model):
     """Supervisor feedback on a chapter — full history kept across rounds."""
     __tablename__ = 'chapter_reviews'
 
-    id          = db.Column(db.Integer, primary_key=True)
     chapter_id  = db.Column(db.Integer, db.ForeignKey('chapters.id'),
                             nullable=False, index=True)
     reviewer_id = db.Column(db.Integer, db.ForeignKey('users.id'),
@@ -593,10 +785,10 @@ class ChapterReview(db.Model):
 
 # ── HELPER FUNCTIONS ──────────────────────────────────────────────────────────
 
-def create_chapters_for_project(project_id):
+def create_chapters_for_project(project_id, commit=False):
     """
     Create 6 Chapter rows for a project (ch1 = UNLOCKED, ch2-6 = LOCKED).
-    Commits to the database.
+    Does NOT commit unless commit=True — caller owns the transaction.
     """
     for order, slug, title, _ in CHAPTER_DEFINITIONS:
         status = ChapterStatus.UNLOCKED if order == 1 else ChapterStatus.LOCKED
@@ -607,7 +799,8 @@ def create_chapters_for_project(project_id):
             title=title,
             status=status,
         ))
-    db.session.commit()
+    if commit:
+        db.session.commit()
 
 
 def unlock_next_chapter(project_id, current_order):
@@ -627,41 +820,137 @@ def unlock_next_chapter(project_id, current_order):
 
 # ── DATABASE INITIALISATION ───────────────────────────────────────────────────
 
+def _engine_options(uri):
+    """
+    Pool settings for server databases. Keep pool_size + max_overflow per
+    worker process under half of PostgreSQL's max_connections in total.
+    SQLite keeps Flask-SQLAlchemy's defaults.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        return {}
+
+    options = {
+        'pool_size':     10,
+        'max_overflow':  20,
+        'pool_timeout':  30,
+        'pool_recycle':  1800,   # below typical server/proxy idle timeouts
+        'pool_pre_ping': True,
+        'insertmanyvalues_page_size': 1000,
+    }
+    if url.get_backend_name() == 'postgresql' and url.get_driver_name() == 'psycopg2':
+        options['executemany_mode'] = 'values_plus_batch'
+    return options
+
+
+# ── QUERY LOG (debug only) ────────────────────────────────────────────────────
+
+_SLOW_QUERY_MS = 50
+
+
+def _install_query_log(app):
+    """Record every statement in g.query_log and expose the per-request count,
+    so a route that slips back into N+1 shows up in the response headers."""
+
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, params, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(db.engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, params, context, executemany):
+        elapsed_ms = (time.perf_counter() - context._query_start) * 1000
+        if elapsed_ms > _SLOW_QUERY_MS:
+            app.logger.warning('Slow query (%.1f ms): %s', elapsed_ms, statement)
+        if has_app_context():
+            g.setdefault('query_log', []).append((statement, elapsed_ms))
+
+    @app.after_request
+    def _query_count_header(response):
+        response.headers['X-SQL-Query-Count'] = str(len(g.get('query_log', ())))
+        return response
+
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite':     sqlite.insert,
+}
+
+
 def init_db(app):
     """Initialise database: create all tables and seed default data."""
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS in the config win over these defaults
+    if app.config.get('SQLALCHEMY_DATABASE_URI'):
+        options = _engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
     db.init_app(app)
+    migrate.init_app(app, db)
 
     with app.app_context():
-        db.create_all()
+        if app.debug:
+            _install_query_log(app)
 
-        # Default admin
-        admin = User.query.filter_by(email=os.environ.get('ADMIN_EMAIL')).first()
-        if not admin:
-            admin = User(
-                email=os.environ.get('ADMIN_EMAIL'),
+        db.create_all()
+        if db.engine.dialect.name == 'postgresql':
+            # Only speeds up ILIKE search, so a role without CREATE on the
+            # database just keeps the sequential scan instead of failing to boot
+            for statement in _POSTGRES_SEARCH_DDL:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(db.text(statement))
+                except DBAPIError as exc:
+                    app.logger.warning('Skipping search index DDL (%s): %s',
+                                       statement, exc.orig)
+
+        # Default admin — hash only when the row is missing, and let a second
+        # worker starting at the same time lose the INSERT instead of failing
+        admin_email = os.environ.get('ADMIN_EMAIL')
+        if db.session.scalar(db.select(User.id).where(User.email == admin_email)) is None:
+            values = dict(
+                email=admin_email,
+                password_hash=_password_hasher().hash(os.environ.get('ADMIN_PASSWORD')),
                 full_name='System Administrator',
                 role=UserRole.ADMIN,
                 is_active=True,
                 is_verified=True,
             )
-            admin.set_password(os.environ.get('ADMIN_PASSWORD'))
-            db.session.add(admin)
+            dialect_insert = _UPSERT_INSERTS.get(db.engine.dialect.name)
+            if dialect_insert is not None:
+                db.session.execute(dialect_insert(User).values(**values)
+                                   .on_conflict_do_nothing(index_elements=['email']))
+            else:
+                db.session.add(User(**values))
 
         # Default streams
-        if Stream.query.count() == 0:
+        if db.session.scalar(db.select(db.func.count(Stream.id))) == 0:
             programs = [
                 'ISE', 'IIT', 'ICS', 'ISA', 'SPT', 'SFP', 'SBT',
                 'EPT', 'EIM', 'EEE', 'ECP', 'BFA', 'BFE', 'BEC',
             ]
             current_year = datetime.utcnow().year
-            for year in range(2023, current_year + 1):
-                for program in programs:
-                    db.session.add(Stream(
-                        name=f'{year} {program}',
-                        year=year,
-                        semester='August',
-                        is_active=(year == current_year),
-                    ))
+            # One executemany INSERT rather than a unit-of-work flush per Stream
+            db.session.execute(db.insert(Stream), [
+                {
+                    'name':      f'{year} {program}',
+                    'year':      year,
+                    'semester':  'August',
+                    'is_active': year == current_year,
+                }
+                for year in range(2023, current_year + 1)
+                for program in programs
+            ])
+
+        # Resynchronise the denormalised counters (also backfills new databases).
+        # A database from before the column existed gets it from `flask db
+        # upgrade`, which has to be able to boot the app first.
+        inspector = db.inspect(db.session.connection())
+        if 'project_count' in {c['name'] for c in inspector.get_columns('streams')}:
+            db.session.execute(db.update(Stream).values(project_count=(
+                db.select(db.func.count(Project.id))
+                .where(Project.stream_id == Stream.id)
+                .scalar_subquery()
+            )))
 
         db.session.commit()
         print("Database initialised successfully!")
@@ -671,12 +960,14 @@ def init_db(app):
 
 __all__ = [
     'db',
+    'migrate',
     'User',
     'Stream',
     'Group',
     'group_members',
     'Project',
     'SimilarityRecord',
+    'SCORE_SCALE',
     'Comment',
     'Attachment',
     'Notification',
@@ -58,6 +58,23 @@ function markAsRead(notificationId) {
     .catch(error => console.error('Error:', error));
 }
 
+// Mark every notification as read
+function markAllAsRead() {
+    fetch('/notifications/read-all', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            window.location.reload();
+        }
+    })
+    .catch(error => console.error('Error:', error));
+}
+
 // Confirm before deleting
 function confirmDelete(message) {
     return confirm(message || 'Are you sure you want to delete this?');